@@ -1,8 +1,20 @@
 # PowerShell script to create a Chrome extension icon with a DR indicator
 # This script automatically finds Python and runs the create_chrome_extension_icon.py script
 
+param(
+    [Parameter(Mandatory=$false)]
+    [string[]]$MetricsFile = @()
+)
+
 $ErrorActionPreference = "Stop"
 
+# Optional run metrics files (.prom for Prometheus textfile, otherwise JSON)
+$MetricsArgs = @()
+foreach ($File in $MetricsFile) {
+    $MetricsArgs += "--metrics"
+    $MetricsArgs += $File
+}
+
 # Get the directory where this script is located
 $ScriptDir = Split-Path -Parent $MyInvocation.MyCommand.Definition
 
@@ -77,7 +89,7 @@ try {
     Write-Host "Input icon: $InputIcon" -ForegroundColor Cyan
     Write-Host "Output icon: $OutputIcon" -ForegroundColor Cyan
     
-    & $PythonExe $PythonScript $InputIcon $OutputIcon
+    & $PythonExe $PythonScript $InputIcon $OutputIcon @MetricsArgs
     
     # Check if icon was created successfully
     if (Test-Path $OutputIcon) {
@@ -13,11 +13,21 @@ param(
     [string]$Size = "1280x800",
     
     [Parameter(Mandatory=$false)]
-    [switch]$SingleFile
+    [switch]$SingleFile,
+    
+    [Parameter(Mandatory=$false)]
+    [string[]]$MetricsFile = @()
 )
 
 $ErrorActionPreference = "Stop"
 
+# Optional run metrics files (.prom for Prometheus textfile, otherwise JSON)
+$MetricsArgs = @()
+foreach ($File in $MetricsFile) {
+    $MetricsArgs += "--metrics"
+    $MetricsArgs += $File
+}
+
 # Find Python executable
 $PythonExe = $null
 $PythonPaths = @(
@@ -69,7 +79,7 @@ if ($SingleFile) {
     Write-Host "Output: $OutputPath" -ForegroundColor Cyan
     Write-Host "Size: $Size" -ForegroundColor Cyan
     
-    & $PythonExe $ScriptPath $InputPath $OutputPath $Size
+    & $PythonExe $ScriptPath $InputPath $OutputPath $Size @MetricsArgs
 } else {
     # Process all screenshots in a directory
     $ScriptPath = Join-Path $ScriptDir "format_all_screenshots.py"
@@ -88,7 +98,7 @@ if ($SingleFile) {
     Write-Host "Output directory: $OutputPath" -ForegroundColor Cyan
     Write-Host "Size: $Size" -ForegroundColor Cyan
     
-    & $PythonExe $ScriptPath $InputPath $OutputPath $Size
+    & $PythonExe $ScriptPath $InputPath $OutputPath $Size @MetricsArgs
 }
 
 # Check if output exists and open folder
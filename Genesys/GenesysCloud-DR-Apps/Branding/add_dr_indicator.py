@@ -1,7 +1,9 @@
 import os
 import sys
+import time
 from PIL import Image, ImageDraw, ImageFont
 import io
+from run_metrics import RunMetrics, pop_metrics_args
 
 def add_dr_indicator_to_icon(input_icon_path, output_icon_path):
     """
@@ -11,6 +13,9 @@ def add_dr_indicator_to_icon(input_icon_path, output_icon_path):
     Args:
         input_icon_path: Path to the original icon file
         output_icon_path: Path where the modified icon will be saved
+    
+    Returns:
+        output_icon_path if an ICO file was written, otherwise None
     """
     # Load the original icon file
     original_icon = Image.open(input_icon_path)
@@ -217,15 +222,23 @@ def add_dr_indicator_to_icon(input_icon_path, output_icon_path):
         except Exception as e2:
             print(f"Even fallback failed: {str(e2)}")
             
-            # Last resort: save as PNG
-            png_path = output_icon_path.replace(".ico", ".png")
-            largest_img.save(png_path)
-            print(f"Saved as PNG instead: {png_path}")
+            # Last resort: save as PNG (the ICO was not written, so this still counts as a failure)
+            try:
+                png_path = output_icon_path.replace(".ico", ".png")
+                largest_img.save(png_path)
+                print(f"Saved as PNG instead: {png_path}")
+            except Exception as e3:
+                print(f"Could not save PNG either: {str(e3)}")
+            return None
     
     return output_icon_path
 
 # Entry point when script is run directly
 if __name__ == "__main__":
+    # Optional --metrics PATH (repeatable; .prom for Prometheus, otherwise JSON)
+    metrics_paths = pop_metrics_args(sys.argv)
+    metrics = RunMetrics("add_dr_indicator")
+    
     # Default paths
     input_path = "GenesysCloud_icon.ico"
     output_path = "GenesysCloud_DR_icon.ico"
@@ -237,4 +250,10 @@ if __name__ == "__main__":
         output_path = sys.argv[2]
     
     print(f"Adding DR overlay to {input_path} and saving to {output_path}")
-    add_dr_indicator_to_icon(input_path, output_path) 
\ No newline at end of file
+    started = time.perf_counter()
+    result = None
+    try:
+        result = add_dr_indicator_to_icon(input_path, output_path)
+    finally:
+        metrics.record_file(input_path, result, time.perf_counter() - started)
+        metrics.write_all(metrics_paths) 
\ No newline at end of file
@@ -0,0 +1,746 @@
+import os
+import io
+import re
+import sys
+import json
+import time
+import hashlib
+import platform
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from PIL import Image, ImageColor
+from create_chrome_extension_icon import render_badge_icon, badge_font_source, BADGE_SHAPES
+from run_metrics import format_prometheus_metric, write_metrics_file, get_peak_rss_bytes, get_pillow_version
+
+# Bump when render_badge_icon output changes so clients stop reusing old ETags.
+# The resolved font (Arial or Pillow's built-in fallback) and Pillow version
+# are part of the ETag as well, since either changes the rendered bytes.
+RENDER_VERSION = 2
+
+# Request limits
+MIN_SIZE = 16
+MAX_SIZE = 512
+MAX_LABEL_LENGTH = 12
+
+# Sizes embedded in ICO responses (only those up to the requested size)
+ICO_SIZES = [16, 32, 48, 64, 128, 256]
+
+# Response formats by URL path
+FORMATS = {
+    "/badge.png": ("png", "image/png"),
+    "/badge.ico": ("ico", "image/x-icon"),
+}
+
+# Rendered badges never change for a given URL unless the base icon or
+# renderer changes, and both are part of the ETag
+CACHE_CONTROL = "public, max-age=3600"
+
+# Prefix for all exported Prometheus metric names
+METRIC_PREFIX = "badge_service"
+
+# Spilled badges live in a per-render-version subdirectory of --spill-dir, and
+# only files named like the service's own keys are ever indexed or deleted
+SPILL_SUBDIR_PATTERN = re.compile(r"^badges-v\d+$")
+SPILL_FILE_PATTERN = re.compile(r"^[0-9a-f]{40}\.bin$")
+SPILL_TEMP_PATTERN = re.compile(r"^[0-9a-f]{40}\.bin\.\d+\.tmp$")
+
+
+class BadgeRequestError(ValueError):
+    """Raised when badge query parameters are missing or invalid"""
+
+
+def parse_badge_params(query):
+    """
+    Validates and normalises badge query parameters.
+
+    Args:
+        query: Dictionary of query parameter lists (as returned by parse_qs)
+
+    Returns:
+        Dictionary with label, color (RGBA tuple), size and shape
+    """
+    def first(name, default):
+        values = query.get(name)
+        return values[0] if values else default
+
+    label = first("label", "DR").strip()
+    if not label or len(label) > MAX_LABEL_LENGTH or not label.isprintable():
+        raise BadgeRequestError(f"label must be 1 to {MAX_LABEL_LENGTH} printable characters")
+
+    color_text = first("color", "red").strip()
+    # Allow hex colors without the '#', which is awkward to put in a URL
+    if len(color_text) in (3, 6, 8) and all(c in "0123456789abcdefABCDEF" for c in color_text):
+        color_text = "#" + color_text
+    try:
+        color = ImageColor.getrgb(color_text)
+    except ValueError:
+        raise BadgeRequestError(f"Unknown color: {color_text}")
+    if len(color) == 3:
+        color = color + (255,)
+
+    try:
+        size = int(first("size", "128"))
+    except ValueError:
+        raise BadgeRequestError("size must be an integer")
+    if size < MIN_SIZE or size > MAX_SIZE:
+        raise BadgeRequestError(f"size must be between {MIN_SIZE} and {MAX_SIZE}")
+
+    shape = first("shape", "square").strip().lower()
+    if shape not in BADGE_SHAPES:
+        raise BadgeRequestError(f"shape must be one of: {', '.join(BADGE_SHAPES)}")
+
+    return {"label": label, "color": color, "size": size, "shape": shape}
+
+
+def file_digest(path):
+    """Returns the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ServiceMetrics:
+    """
+    Thread-safe counters for a long-running badge service: requests by status
+    code, renders and their duration, and cache lookups per tier.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.requests = {}
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, status_code):
+        """Counts a response by HTTP status code"""
+        with self._lock:
+            self.requests[status_code] = self.requests.get(status_code, 0) + 1
+
+    def record_render(self, duration_seconds):
+        """Counts a render and the time it took"""
+        with self._lock:
+            self.renders += 1
+            self.render_seconds += duration_seconds
+
+    def record_cache(self, cache_name, hit, count=1):
+        """Counts cache lookups for cache_name ("memory", "disk" or "etag")"""
+        with self._lock:
+            counts = self.caches.setdefault(cache_name, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += count
+
+    def to_dict(self, cache_stats=None):
+        """
+        Returns the counters as a JSON-serialisable dictionary.
+
+        Args:
+            cache_stats: Result of BadgeCache.stats(), included as cache usage
+        """
+        with self._lock:
+            caches = {}
+            for name, counts in self.caches.items():
+                lookups = counts["hits"] + counts["misses"]
+                caches[name] = {
+                    "hits": counts["hits"],
+                    "misses": counts["misses"],
+                    "hit_rate": counts["hits"] / lookups if lookups else None,
+                }
+            return {
+                "started_at": self.started_at,
+                "python_version": platform.python_version(),
+                "pillow_version": get_pillow_version(),
+                "render_version": RENDER_VERSION,
+                "requests": {str(code): count for code, count in sorted(self.requests.items())},
+                "renders": self.renders,
+                "render_duration_seconds": self.render_seconds,
+                "caches": caches,
+                "cache_usage": cache_stats or {},
+                "peak_rss_bytes": get_peak_rss_bytes(),
+            }
+
+    def to_prometheus(self, summary):
+        """Returns a to_dict() summary in Prometheus text exposition format"""
+        lines = []
+
+        def add(name, metric_type, help_text, samples):
+            lines.extend(format_prometheus_metric(f"{METRIC_PREFIX}_{name}", metric_type, help_text, samples))
+
+        add("info", "gauge", "Versions used by the service.", [
+            ("", {"python_version": summary["python_version"],
+                  "pillow_version": summary["pillow_version"] or "unknown",
+                  "render_version": summary["render_version"]}, 1),
+        ])
+        add("start_time_seconds", "gauge", "Unix time at which the service started.", [
+            ("", {}, summary["started_at"]),
+        ])
+        add("requests_total", "counter", "Responses sent, by HTTP status code.", [
+            ("", {"code": code}, count) for code, count in summary["requests"].items()
+        ])
+        add("renders_total", "counter", "Badges rendered (requests not answered from a cache).", [
+            ("", {}, summary["renders"]),
+        ])
+        add("render_duration_seconds", "summary", "Time spent rendering badges.", [
+            ("_sum", {}, summary["render_duration_seconds"]),
+            ("_count", {}, summary["renders"]),
+        ])
+        add("cache_lookups_total", "counter", "Cache lookups, by cache and result.", [
+            ("", {"cache": name, "result": result}, counts[key])
+            for name, counts in sorted(summary["caches"].items())
+            for result, key in (("hit", "hits"), ("miss", "misses"))
+        ])
+        add("cache_hit_ratio", "gauge", "Fraction of cache lookups that were hits.", [
+            ("", {"cache": name}, counts["hit_rate"])
+            for name, counts in sorted(summary["caches"].items())
+        ])
+        usage = sorted(summary["cache_usage"].items())
+        add("cache_bytes", "gauge", "Bytes currently held, by cache tier.", [
+            ("", {"tier": tier}, stats["bytes"]) for tier, stats in usage
+        ])
+        add("cache_entries", "gauge", "Entries currently held, by cache tier.", [
+            ("", {"tier": tier}, stats["entries"]) for tier, stats in usage
+        ])
+        add("cache_limit_bytes", "gauge", "Configured byte limit, by cache tier.", [
+            ("", {"tier": tier}, stats["max_bytes"]) for tier, stats in usage
+        ])
+        add("cache_limit_entries", "gauge", "Configured entry limit, by cache tier.", [
+            ("", {"tier": tier}, stats["max_entries"]) for tier, stats in usage
+        ])
+        add("peak_rss_bytes", "gauge", "Peak resident set size of the process.", [
+            ("", {}, summary["peak_rss_bytes"]),
+        ])
+        return "\n".join(lines) + "\n"
+
+
+class BadgeCache:
+    """
+    Thread-safe LRU cache of rendered badges, bounded by total bytes and entry
+    count. Entries evicted from memory are spilled to disk (if a spill
+    directory is configured) and promoted back to memory on the next hit.
+    The spill directory has its own byte and file budget; when it is exceeded
+    the least recently used files (by mtime) are deleted. Spilled files go in
+    a badges-v<RENDER_VERSION> subdirectory of spill_dir, and only keys that
+    look like badge_key() results (40 hex characters) are spilled.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_entries=512, spill_dir=None, metrics=None,
+                 spill_max_bytes=256 * 1024 * 1024, spill_max_files=4096):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.spill_root = spill_dir
+        self.spill_dir = os.path.join(spill_dir, f"badges-v{RENDER_VERSION}") if spill_dir else None
+        self.spill_max_bytes = spill_max_bytes
+        self.spill_max_files = spill_max_files
+        self.metrics = metrics
+        self.current_bytes = 0
+        self.spill_bytes = 0
+        self._entries = OrderedDict()
+        # Spilled files, oldest first, with their sizes
+        self._spilled = OrderedDict()
+        self.lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+
+        if self.spill_dir:
+            if not os.path.exists(self.spill_dir):
+                os.makedirs(self.spill_dir)
+            self._remove_old_spill_versions()
+            self._load_spill_index()
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.bin")
+
+    def _remove_old_spill_versions(self):
+        """Deletes badge files spilled by other render versions, which can never be hit again"""
+        current = os.path.basename(self.spill_dir)
+        for subdir in os.listdir(self.spill_root):
+            path = os.path.join(self.spill_root, subdir)
+            if subdir == current or not SPILL_SUBDIR_PATTERN.match(subdir) or not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                if SPILL_FILE_PATTERN.match(name) or SPILL_TEMP_PATTERN.match(name):
+                    try:
+                        os.remove(os.path.join(path, name))
+                    except OSError:
+                        pass
+            try:
+                # Only succeeds if nothing else was stored there
+                os.rmdir(path)
+            except OSError:
+                pass
+
+    def _load_spill_index(self):
+        """Indexes files left by a previous run and prunes them to the current budget"""
+        found = []
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if SPILL_TEMP_PATTERN.match(name):
+                    # Left behind by an interrupted write
+                    os.remove(path)
+                elif SPILL_FILE_PATTERN.match(name):
+                    stat = os.stat(path)
+                    found.append((stat.st_mtime, name[:-len(".bin")], stat.st_size))
+            except OSError:
+                pass
+
+        with self._spill_lock:
+            for _, key, size in sorted(found):
+                self._spilled[key] = size
+                self.spill_bytes += size
+            self._prune_spill()
+
+    def _prune_spill(self):
+        # Callers must hold self._spill_lock
+        while self._spilled and (self.spill_bytes > self.spill_max_bytes or len(self._spilled) > self.spill_max_files):
+            old_key, old_size = self._spilled.popitem(last=False)
+            self.spill_bytes -= old_size
+            try:
+                os.remove(self._spill_path(old_key))
+            except OSError:
+                pass
+
+    def record(self, cache_name, hit):
+        """Records a lookup in a cache tier (or related cache, e.g. ETag revalidation) in the metrics"""
+        if self.metrics is not None:
+            self.metrics.record_cache(cache_name, hit)
+
+    def get(self, key):
+        """Returns the cached bytes for key, or None if it is not cached"""
+        with self.lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        self.record("memory", data is not None)
+        if data is not None or not self.spill_dir:
+            return data
+
+        try:
+            with open(self._spill_path(key), "rb") as handle:
+                data = handle.read()
+        except OSError:
+            self.record("disk", False)
+            return None
+
+        self.record("disk", True)
+        self.put(key, data)
+        return data
+
+    def put(self, key, data):
+        """Stores data under key, evicting least recently used entries as needed"""
+        evicted = []
+        with self.lock:
+            if key in self._entries:
+                self.current_bytes -= len(self._entries.pop(key))
+
+            if len(data) <= self.max_bytes:
+                self._entries[key] = data
+                self.current_bytes += len(data)
+            else:
+                # Too large to keep in memory at all
+                evicted.append((key, data))
+
+            while self._entries and (self.current_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                old_key, old_data = self._entries.popitem(last=False)
+                self.current_bytes -= len(old_data)
+                evicted.append((old_key, old_data))
+
+        # Write spilled entries outside the lock so disk I/O does not block readers
+        for old_key, old_data in evicted:
+            self._spill(old_key, old_data)
+
+    def _spill(self, key, data):
+        if not self.spill_dir or len(data) > self.spill_max_bytes or not SPILL_FILE_PATTERN.match(f"{key}.bin"):
+            return
+        spill_path = self._spill_path(key)
+        with self._spill_lock:
+            if key in self._spilled:
+                # Already on disk; mark it as recently used
+                self._spilled.move_to_end(key)
+                try:
+                    os.utime(spill_path)
+                except OSError:
+                    pass
+                return
+
+            temp_path = f"{spill_path}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "wb") as handle:
+                    handle.write(data)
+                os.replace(temp_path, spill_path)
+            except OSError as e:
+                print(f"Error spilling badge {key} to disk: {str(e)}")
+                return
+
+            self._spilled[key] = len(data)
+            self.spill_bytes += len(data)
+            self._prune_spill()
+
+    def stats(self):
+        """Returns current usage and limits of the memory and disk tiers"""
+        with self.lock:
+            memory = {
+                "bytes": self.current_bytes,
+                "entries": len(self._entries),
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+            }
+        with self._spill_lock:
+            disk = {
+                "bytes": self.spill_bytes,
+                "entries": len(self._spilled),
+                "max_bytes": self.spill_max_bytes if self.spill_dir else 0,
+                "max_entries": self.spill_max_files if self.spill_dir else 0,
+            }
+        return {"memory": memory, "disk": disk}
+
+    def __len__(self):
+        with self.lock:
+            return len(self._entries)
+
+
+class BadgeIconService:
+    """
+    Renders badge icons on top of a base icon and caches the encoded results.
+    Identical concurrent requests share a single render.
+    """
+
+    def __init__(self, base_icon_path, cache=None, metrics=None):
+        self.base_icon_path = base_icon_path
+        self.metrics = metrics if metrics is not None else ServiceMetrics()
+        self.cache = cache if cache is not None else BadgeCache()
+        # Service and cache share one metrics object
+        if self.cache.metrics is None:
+            self.cache.metrics = self.metrics
+        else:
+            self.metrics = self.cache.metrics
+
+        # Load the base icon once; renders work on copies of it
+        self.base_icon = Image.open(base_icon_path)
+        self.base_icon.load()
+        self.base_digest = file_digest(base_icon_path)
+        self.pillow_version = get_pillow_version()
+        self.font_source = badge_font_source()
+
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def metrics_summary(self):
+        """Returns the service metrics, including current cache usage"""
+        return self.metrics.to_dict(self.cache.stats())
+
+    def metrics_text(self):
+        """Returns the service metrics in Prometheus text format"""
+        return self.metrics.to_prometheus(self.metrics_summary())
+
+    def write_metrics(self, metrics_paths):
+        """Writes the service metrics to each path (.prom for Prometheus, otherwise JSON)"""
+        if not metrics_paths:
+            return
+        summary = self.metrics_summary()
+        for metrics_path in metrics_paths:
+            try:
+                write_metrics_file(metrics_path, summary, self.metrics.to_prometheus)
+                print(f"Wrote service metrics: {metrics_path}")
+            except Exception as e:
+                print(f"Error writing service metrics to {metrics_path}: {str(e)}")
+
+    def badge_key(self, fmt, params):
+        """
+        Returns the cache key (also used as the strong ETag) for a badge. It is
+        derived from the request alone so conditional requests can be answered
+        without rendering.
+        """
+        key_data = json.dumps([
+            RENDER_VERSION,
+            self.base_digest,
+            self.pillow_version,
+            self.font_source,
+            fmt,
+            params["label"],
+            list(params["color"]),
+            params["size"],
+            params["shape"],
+        ])
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()[:40]
+
+    def render(self, fmt, params):
+        """Renders a badge and returns the encoded bytes"""
+        started = time.perf_counter()
+        if fmt == "ico":
+            sizes = [size for size in ICO_SIZES if size <= params["size"]] or [MIN_SIZE]
+            if params["size"] <= ICO_SIZES[-1] and params["size"] not in sizes:
+                sizes.append(params["size"])
+            images = [
+                render_badge_icon(self.base_icon, params["label"], params["color"], size, params["shape"])
+                for size in sorted(sizes, reverse=True)
+            ]
+            output = io.BytesIO()
+            images[0].save(
+                output,
+                format="ICO",
+                sizes=[(img.width, img.height) for img in images],
+                append_images=images[1:]
+            )
+        else:
+            image = render_badge_icon(
+                self.base_icon, params["label"], params["color"], params["size"], params["shape"]
+            )
+            output = io.BytesIO()
+            image.save(output, format="PNG")
+
+        data = output.getvalue()
+        self.metrics.record_render(time.perf_counter() - started)
+        return data
+
+    def get_badge(self, fmt, params, key=None):
+        """
+        Returns the encoded badge, from cache when possible.
+
+        Args:
+            fmt: "png" or "ico"
+            params: Result of parse_badge_params()
+            key: Precomputed badge_key(), if already known
+        """
+        if key is None:
+            key = self.badge_key(fmt, params)
+
+        while True:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+
+            with self._lock:
+                event = self._inflight.get(key)
+                owner = event is None
+                if owner:
+                    event = threading.Event()
+                    self._inflight[key] = event
+
+            if not owner:
+                # Another worker is rendering this badge; wait and re-check the cache
+                event.wait()
+                continue
+
+            try:
+                data = self.render(fmt, params)
+                self.cache.put(key, data)
+                return data
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                event.set()
+
+
+def etag_matches(if_none_match, etag):
+    """Returns True if an If-None-Match header value matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class BadgeRequestHandler(BaseHTTPRequestHandler):
+    """Handles GET/HEAD requests for /badge.png, /badge.ico, /healthz and /metrics"""
+
+    server_version = "BadgeIconService/1"
+    # Do not let a slow client hold a worker forever
+    timeout = 10
+
+    def do_HEAD(self):
+        self.handle_badge_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_badge_request(send_body=True)
+
+    def handle_badge_request(self, send_body):
+        service = self.server.service
+        url = urlsplit(self.path)
+
+        if url.path == "/healthz":
+            self.send_text(200, "text/plain; charset=utf-8", "ok\n", send_body)
+            return
+        if url.path == "/metrics":
+            self.send_text(200, "text/plain; version=0.0.4; charset=utf-8", service.metrics_text(), send_body)
+            return
+        if url.path not in FORMATS:
+            self.send_error_json(404, f"Unknown path: {url.path}", send_body)
+            return
+
+        fmt, content_type = FORMATS[url.path]
+        try:
+            params = parse_badge_params(parse_qs(url.query, keep_blank_values=True))
+        except BadgeRequestError as e:
+            self.send_error_json(400, str(e), send_body)
+            return
+
+        key = service.badge_key(fmt, params)
+        etag = f'"{key}"'
+
+        # Conditional request for a badge the client already has: no render needed.
+        # Only conditional requests count as ETag lookups.
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            matched = etag_matches(if_none_match, etag)
+            service.cache.record("etag", matched)
+            if matched:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", CACHE_CONTROL)
+                self.end_headers()
+                return
+
+        try:
+            data = service.get_badge(fmt, params, key)
+        except Exception as e:
+            self.send_error_json(500, f"Error rendering badge: {str(e)}", send_body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def send_response(self, code, message=None):
+        self.server.service.metrics.record_request(code)
+        super().send_response(code, message)
+
+    def send_text(self, status, content_type, text, send_body):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_error_json(self, status, message, send_body):
+        self.send_text(status, "application/json", json.dumps({"error": message}) + "\n", send_body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class BadgeIconServer(HTTPServer):
+    """
+    HTTP server that hands each connection to a fixed-size worker pool. At most
+    max_pending connections (default: four per worker) are queued or in
+    progress; further connections are answered with 503 straight away.
+    """
+
+    def __init__(self, server_address, service, workers=4, quiet=False, max_pending=None):
+        super().__init__(server_address, BadgeRequestHandler)
+        self.service = service
+        self.quiet = quiet
+        self.max_pending = max_pending if max_pending is not None else workers * 4
+        self._pending = threading.BoundedSemaphore(self.max_pending)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="badge-worker")
+
+    def process_request(self, request, client_address):
+        if not self._pending.acquire(blocking=False):
+            self.reject_request(request)
+            return
+        self.executor.submit(self.process_request_worker, request, client_address)
+
+    def reject_request(self, request):
+        """Answers a connection with 503 from the accept loop without reading the request"""
+        body = json.dumps({"error": "Server busy, try again"}).encode("utf-8") + b"\n"
+        response = (
+            b"HTTP/1.0 503 Service Unavailable\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Retry-After: 1\r\n"
+            b"Connection: close\r\n"
+            b"Content-Length: " + str(len(body)).encode("ascii") + b"\r\n\r\n" + body
+        )
+        try:
+            # The response fits in the socket buffer, so this does not stall the accept loop
+            request.settimeout(1)
+            request.sendall(response)
+        except OSError:
+            pass
+        finally:
+            self.service.metrics.record_request(503)
+            self.shutdown_request(request)
+
+    def process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._pending.release()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def main(argv=None):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Serve badge icons rendered on demand from a base icon.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on, 0 for any free port (default: 8765)")
+    parser.add_argument("--base-icon", default="GenesysCloud_icon.ico", help="Icon to draw badges on")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker threads (default: 4)")
+    parser.add_argument("--max-pending", type=int,
+                        help="Connections queued or in progress before answering 503 (default: 4 per worker)")
+    parser.add_argument("--cache-mb", type=float, default=32, help="In-memory cache size in MB (default: 32)")
+    parser.add_argument("--cache-entries", type=int, default=512, help="Maximum in-memory cache entries (default: 512)")
+    parser.add_argument("--spill-dir", help="Directory for badges evicted from memory (default: no spill)")
+    parser.add_argument("--spill-mb", type=float, default=256, help="Disk spill size in MB (default: 256)")
+    parser.add_argument("--spill-files", type=int, default=4096, help="Maximum disk spill files (default: 4096)")
+    parser.add_argument("--metrics", action="append", default=[],
+                        help="Write service metrics on shutdown (.prom for Prometheus, otherwise JSON); repeatable")
+    parser.add_argument("--quiet", action="store_true", help="Do not log each request")
+    args = parser.parse_args(argv)
+
+    # If base icon is not absolute and doesn't exist, try finding it relative to script dir
+    base_icon = args.base_icon
+    if not os.path.isabs(base_icon) and not os.path.exists(base_icon):
+        script_relative_path = os.path.join(script_dir, base_icon)
+        if os.path.exists(script_relative_path):
+            base_icon = script_relative_path
+    if not os.path.exists(base_icon):
+        print(f"Error: Base icon not found: {base_icon}")
+        return 1
+
+    metrics = ServiceMetrics()
+    cache = BadgeCache(int(args.cache_mb * 1024 * 1024), args.cache_entries, args.spill_dir, metrics,
+                       int(args.spill_mb * 1024 * 1024), args.spill_files)
+    service = BadgeIconService(base_icon, cache, metrics)
+    server = BadgeIconServer((args.host, args.port), service, args.workers, args.quiet, args.max_pending)
+
+    host, port = server.server_address[:2]
+    print(f"Serving badge icons from {base_icon} on http://{host}:{port}/badge.png")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down")
+    finally:
+        server.server_close()
+        service.write_metrics(args.metrics)
+    return 0
+
+
+# Entry point when script is run directly
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,146 @@
 import os
 import sys
+import time
+import functools
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from run_metrics import RunMetrics, pop_metrics_args
+
+# Shapes supported for the indicator drawn by render_badge_icon
+BADGE_SHAPES = ("square", "circle", "triangle")
+
+@functools.lru_cache(maxsize=64)
+def load_badge_font(font_size):
+    """
+    Loads Arial Bold (or the best available fallback) at the given size.
+    Fonts are cached per size so repeated renders do not reload them from disk.
+    """
+    try:
+        # Try to load Arial Bold font
+        return ImageFont.truetype("arialbd.ttf", font_size)
+    except:
+        try:
+            # Fall back to Arial
+            return ImageFont.truetype("arial.ttf", font_size)
+        except:
+            # Last resort: default font, which is only scalable on Pillow 10.1+
+            try:
+                return ImageFont.load_default(size=font_size)
+            except TypeError:
+                return ImageFont.load_default()
+
+def badge_font_source():
+    """
+    Returns the font file load_badge_font resolves to, or "default" /
+    "default-fixed" for Pillow's built-in scalable / fixed-size font.
+    """
+    font = load_badge_font(20)
+    path = getattr(font, 'path', None)
+    if isinstance(path, str):
+        return path
+    return "default" if getattr(font, 'size', None) == 20 else "default-fixed"
+
+def measure_text(font, text, font_size):
+    """Returns the (width, height) of text drawn with font"""
+    if hasattr(font, 'getbbox'):
+        text_bbox = font.getbbox(text)
+        return text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1]
+    
+    # Fallback for older PIL versions
+    try:
+        return font.getsize(text)
+    except:
+        return font_size * len(text), font_size
+
+def render_badge_icon(original_icon, label="DR", color=(255, 0, 0, 255), size=128, shape="square"):
+    """
+    Renders a Chrome-style extension icon with an environment indicator in memory.
+    
+    The layout is the 128x128 Chrome layout (96x96 content, 16px padding)
+    scaled to the requested size. Long labels widen the indicator and, if
+    needed, shrink the font so the text stays inside the content area.
+    
+    Args:
+        original_icon: PIL image to use as the base icon
+        label: Text drawn on the indicator (e.g. "DR", "TEST")
+        color: RGBA tuple used to fill the indicator
+        size: Width and height of the square output image in pixels
+        shape: One of BADGE_SHAPES
+    
+    Returns:
+        RGBA PIL image of size x size pixels
+    """
+    if shape not in BADGE_SHAPES:
+        raise ValueError(f"Unsupported badge shape: {shape}")
+    
+    # Scale the 128x128 layout (16px padding, 40px indicator, 20pt text)
+    padding = size // 8
+    content_size = size - 2 * padding
+    indicator_size = size * 5 // 16
+    font_size = max(size * 5 // 32, 6)
+    margin = max(indicator_size // 10, 1)
+    
+    # Create a new transparent canvas
+    chrome_icon = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    
+    # Resize original to the content size
+    icon_content = original_icon.copy()
+    icon_content = icon_content.resize((content_size, content_size), Image.LANCZOS)
+    
+    # Center the content on the canvas
+    chrome_icon.paste(icon_content, (padding, padding), icon_content if icon_content.mode == 'RGBA' else None)
+    
+    # Create an overlay for the indicator
+    overlay = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    
+    # Widen the indicator for long labels, then shrink the text if it still does not fit
+    font = load_badge_font(font_size)
+    text_width, text_height = measure_text(font, label, font_size)
+    box_width = min(max(indicator_size, text_width + 2 * margin), content_size)
+    while text_width > box_width - 2 * margin and font_size > 6:
+        font_size -= 1
+        font = load_badge_font(font_size)
+        if getattr(font, 'size', None) != font_size:
+            # Fixed-size fallback font; shrinking further changes nothing
+            break
+        text_width, text_height = measure_text(font, label, font_size)
+    
+    # The indicator sits in the bottom right corner within the content area
+    # (not extending into the padding)
+    right = size - padding
+    bottom = size - padding
+    
+    if shape == "triangle":
+        # Corner triangle, with the text centered in its widest part
+        corner = min(box_width * 2, content_size)
+        draw.polygon(
+            [(right - corner, bottom), (right, bottom - corner), (right, bottom)],
+            fill=color
+        )
+        text_x = right - (corner // 3 + text_width // 2)
+        text_y = bottom - (corner // 3 + text_height // 2)
+    else:
+        box = [(right - box_width, bottom - indicator_size), (right, bottom)]
+        if shape == "circle":
+            draw.ellipse(box, fill=color)
+        else:
+            draw.rectangle(box, fill=color)
+        
+        # Center text in the indicator
+        text_x = right - (box_width // 2 + text_width // 2)
+        text_y = bottom - (indicator_size // 2 + text_height // 2)
+    
+    # White text, or black on light indicator colors so it stays readable
+    luminance = 0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2]
+    text_color = (0, 0, 0, 255) if luminance > 160 else (255, 255, 255, 255)
+    draw.text((text_x, text_y), label, fill=text_color, font=font)
+    
+    # Add a subtle white glow to the main icon if it's dark
+    # This helps it stand out against dark backgrounds
+    icon_with_glow = add_subtle_glow(chrome_icon)
+    
+    # Composite the indicator overlay onto the icon
+    return Image.alpha_composite(icon_with_glow, overlay)
 
 def create_chrome_extension_icon(input_icon_path, output_icon_path):
     """
@@ -21,71 +161,8 @@ def create_chrome_extension_icon(input_icon_path, output_icon_path):
         # Open the original icon
         original_icon = Image.open(input_icon_path)
         
-        # Create a new transparent 128x128 image (Chrome extension requirement)
-        chrome_icon = Image.new('RGBA', (128, 128), (0, 0, 0, 0))
-        
-        # Resize original to 96x96 (the content size required by Chrome)
-        icon_content = original_icon.copy()
-        icon_content = icon_content.resize((96, 96), Image.LANCZOS)
-        
-        # Center the 96x96 content on the 128x128 canvas (16px padding on each side)
-        chrome_icon.paste(icon_content, (16, 16), icon_content if icon_content.mode == 'RGBA' else None)
-        
-        # Create an overlay for the DR indicator
-        overlay = Image.new('RGBA', (128, 128), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Calculate DR indicator size
-        indicator_size = 40  # Size of the red square
-        
-        # Draw a solid red square in the bottom right corner within the content area
-        # (not extending into the padding)
-        draw.rectangle(
-            [(128-16-indicator_size, 128-16-indicator_size), (128-16, 128-16)],
-            fill=(255, 0, 0, 255)  # Pure red, fully opaque
-        )
-        
-        # Add "DR" text
-        text = "DR"
-        font_size = 20  # Adjust size based on testing
-        
-        try:
-            # Try to load Arial Bold font
-            font = ImageFont.truetype("arialbd.ttf", font_size)
-        except:
-            try:
-                # Fall back to Arial
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except:
-                # Last resort: default font
-                font = ImageFont.load_default()
-        
-        # Calculate text position
-        if hasattr(font, 'getbbox'):
-            text_bbox = font.getbbox(text)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-        else:
-            # Fallback for older PIL versions
-            try:
-                text_width, text_height = font.getsize(text)
-            except:
-                text_width = font_size * 2
-                text_height = font_size
-        
-        # Center text in the red square
-        text_x = 128 - 16 - (indicator_size // 2 + text_width // 2)
-        text_y = 128 - 16 - (indicator_size // 2 + text_height // 2)
-        
-        # Draw the white text
-        draw.text((text_x, text_y), text, fill=(255, 255, 255, 255), font=font)
-        
-        # Add a subtle white glow to the main icon if it's dark
-        # This helps it stand out against dark backgrounds
-        icon_with_glow = add_subtle_glow(chrome_icon)
-        
-        # Composite the DR indicator overlay onto the icon
-        final_icon = Image.alpha_composite(icon_with_glow, overlay)
+        # Render the 128x128 icon (Chrome extension requirement) with a red DR square
+        final_icon = render_badge_icon(original_icon)
         
         # Ensure output directory exists
         output_dir = os.path.dirname(output_icon_path)
@@ -139,6 +216,10 @@ def add_subtle_glow(image):
 
 # Entry point when script is run directly
 if __name__ == "__main__":
+    # Optional --metrics PATH (repeatable; .prom for Prometheus, otherwise JSON)
+    metrics_paths = pop_metrics_args(sys.argv)
+    metrics = RunMetrics("create_chrome_extension_icon")
+    
     # Default paths
     input_path = "GenesysCloud_icon.ico"
     output_path = "GenesysCloud_DR_128.png"
@@ -163,4 +244,7 @@ if __name__ == "__main__":
         output_path = os.path.join(script_dir, output_path)
     
     print(f"Creating Chrome extension icon from {input_path} and saving to {output_path}")
-    create_chrome_extension_icon(input_path, output_path) 
\ No newline at end of file
+    started = time.perf_counter()
+    result = create_chrome_extension_icon(input_path, output_path)
+    metrics.record_file(input_path, result, time.perf_counter() - started)
+    metrics.write_all(metrics_paths) 
\ No newline at end of file
@@ -1,9 +1,18 @@
 import os
+import sys
+import time
 from PIL import Image, ImageDraw, ImageFont
+from run_metrics import RunMetrics, pop_metrics_args
+
+# Optional --metrics PATH (repeatable; .prom for Prometheus, otherwise JSON)
+metrics_paths = pop_metrics_args(sys.argv)
+metrics = RunMetrics("fix_256x256")
 
 # Load the original icon
 original_icon_path = "GenesysCloud_icon.ico"
 output_path = "GenesysCloud_DR_256x256.png"
+written_paths = []
+started = time.perf_counter()
 
 try:
     # Open the icon and resize to 256x256
@@ -58,12 +67,19 @@ try:
     
     # Save the result
     final_img.save(output_path)
+    written_paths.append(output_path)
     print(f"Successfully created 256x256 DR image: {output_path}")
     
     # Also save directly as ICO
     ico_path = "GenesysCloud_DR_256.ico"
     final_img.save(ico_path, format="ICO")
+    written_paths.append(ico_path)
     print(f"Also saved as ICO: {ico_path}")
     
 except Exception as e:
-    print(f"Error: {str(e)}") 
\ No newline at end of file
+    print(f"Error: {str(e)}")
+    # A partial run still counts as a failure
+    written_paths = []
+
+metrics.record_file(original_icon_path, written_paths, time.perf_counter() - started)
+metrics.write_all(metrics_paths) 
\ No newline at end of file
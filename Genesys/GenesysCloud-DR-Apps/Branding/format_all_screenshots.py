@@ -1,7 +1,9 @@
 import os
 import sys
+import time
 from PIL import Image
 import glob
+from run_metrics import RunMetrics, pop_metrics_args
 
 def format_screenshot(input_path, output_path, target_size="1280x800"):
     """
@@ -60,7 +62,15 @@ def format_screenshot(input_path, output_path, target_size="1280x800"):
         print(f"Error formatting screenshot: {str(e)}")
         return None
 
-def process_directory(input_dir, output_dir, target_size="1280x800"):
+def is_readable_image(path):
+    """Returns True if Pillow can identify the file as an image"""
+    try:
+        with Image.open(path):
+            return True
+    except Exception:
+        return False
+
+def process_directory(input_dir, output_dir, target_size="1280x800", metrics=None):
     """
     Process all image files in a directory and convert them to Chrome Web Store format.
     
@@ -68,6 +78,7 @@ def process_directory(input_dir, output_dir, target_size="1280x800"):
         input_dir: Directory containing screenshots to process
         output_dir: Directory to save formatted screenshots
         target_size: Either "1280x800" or "640x400"
+        metrics: Optional RunMetrics instance that records each file's outcome
     """
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
@@ -93,8 +104,18 @@ def process_directory(input_dir, output_dir, target_size="1280x800"):
         name, _ = os.path.splitext(base_name)
         output_path = os.path.join(output_dir, f"{name}_{target_size.replace('x', '_')}.png")
         
+        # Skip files that only look like images (e.g. empty or renamed files)
+        started = time.perf_counter()
+        if not is_readable_image(image_path):
+            print(f"Skipping {image_path}: not a readable image")
+            if metrics is not None:
+                metrics.record_file(image_path, None, time.perf_counter() - started, skipped=True)
+            continue
+        
         # Format the screenshot
         result = format_screenshot(image_path, output_path, target_size)
+        if metrics is not None:
+            metrics.record_file(image_path, result, time.perf_counter() - started)
         if result:
             successful += 1
     
@@ -103,6 +124,10 @@ def process_directory(input_dir, output_dir, target_size="1280x800"):
 
 # Entry point when script is run directly
 if __name__ == "__main__":
+    # Optional --metrics PATH (repeatable; .prom for Prometheus, otherwise JSON)
+    metrics_paths = pop_metrics_args(sys.argv)
+    metrics = RunMetrics("format_all_screenshots")
+    
     # Default values
     input_dir = "."  # Current directory
     output_dir = "./chrome_screenshots"
@@ -120,4 +145,5 @@ if __name__ == "__main__":
     print(f"Saving formatted screenshots to {output_dir}")
     print(f"Target size: {size}")
     
-    process_directory(input_dir, output_dir, size) 
\ No newline at end of file
+    process_directory(input_dir, output_dir, size, metrics)
+    metrics.write_all(metrics_paths) 
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
 import sys
+import time
 from PIL import Image
+from run_metrics import RunMetrics, pop_metrics_args
 
 def format_screenshot(input_path, output_path, target_size="1280x800"):
     """
@@ -62,6 +64,10 @@ def format_screenshot(input_path, output_path, target_size="1280x800"):
 
 # Entry point when script is run directly
 if __name__ == "__main__":
+    # Optional --metrics PATH (repeatable; .prom for Prometheus, otherwise JSON)
+    metrics_paths = pop_metrics_args(sys.argv)
+    metrics = RunMetrics("format_screenshot")
+    
     # Default values
     input_path = "Screenshot 2025-04-10 085911.png"
     output_path = "Chrome_Store_Screenshot_1280x800.png"
@@ -82,4 +88,7 @@ if __name__ == "__main__":
         output_path = os.path.join(output_path, f"{name}_{size}.png")
     
     print(f"Formatting screenshot {input_path} to {size} PNG")
-    format_screenshot(input_path, output_path, size) 
\ No newline at end of file
+    started = time.perf_counter()
+    result = format_screenshot(input_path, output_path, size)
+    metrics.record_file(input_path, result, time.perf_counter() - started)
+    metrics.write_all(metrics_paths) 
\ No newline at end of file
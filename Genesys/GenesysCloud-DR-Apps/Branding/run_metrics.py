@@ -0,0 +1,359 @@
+import os
+import sys
+import json
+import time
+import platform
+
+# Command line option used by every branding script to request a metrics file.
+# It can be given more than once, e.g. to write both JSON and Prometheus files.
+METRICS_OPTION = "--metrics"
+
+# Files with these extensions are written in Prometheus textfile format,
+# everything else is written as JSON
+PROMETHEUS_EXTENSIONS = (".prom",)
+
+# Prefix for all exported Prometheus metric names
+METRIC_PREFIX = "branding_run"
+
+
+def pop_metrics_args(argv):
+    """
+    Removes every "--metrics PATH" / "--metrics=PATH" option from an argument
+    list so the remaining positional arguments can be parsed as before.
+
+    Args:
+        argv: Argument list to modify in place (normally sys.argv)
+
+    Returns:
+        List of metrics file paths that were requested (may be empty)
+    """
+    metrics_paths = []
+    index = 1
+    while index < len(argv):
+        arg = argv[index]
+        if arg == METRICS_OPTION:
+            if index + 1 >= len(argv):
+                print(f"Warning: {METRICS_OPTION} requires a file path, ignoring it")
+                del argv[index]
+                continue
+            metrics_paths.append(argv[index + 1])
+            del argv[index:index + 2]
+        elif arg.startswith(METRICS_OPTION + "="):
+            metrics_paths.append(arg[len(METRICS_OPTION) + 1:])
+            del argv[index]
+        else:
+            index += 1
+    return metrics_paths
+
+
+def get_peak_rss_bytes():
+    """Returns the peak resident set size of this process in bytes, or None if unavailable"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS reports bytes
+        if sys.platform == "darwin":
+            return int(peak)
+        return int(peak) * 1024
+    except ImportError:
+        pass
+
+    # The resource module does not exist on Windows, ask the OS directly
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return int(counters.PeakWorkingSetSize)
+        except Exception:
+            pass
+
+    return None
+
+
+def get_pillow_version():
+    """Returns the installed Pillow version, or None if Pillow is not importable"""
+    try:
+        import PIL
+        return PIL.__version__
+    except Exception:
+        return None
+
+
+def format_prometheus_metric(name, metric_type, help_text, samples):
+    """
+    Formats one metric family in Prometheus text exposition format.
+
+    Args:
+        name: Full metric name
+        metric_type: "gauge", "counter" or "summary"
+        help_text: Description for the HELP line
+        samples: List of (suffix, labels, value) tuples; samples with a None value are dropped
+
+    Returns:
+        List of lines (empty if there are no samples)
+    """
+    samples = [sample for sample in samples if sample[2] is not None]
+    if not samples:
+        return []
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+def write_metrics_file(metrics_path, summary, to_prometheus):
+    """
+    Writes a metrics summary. Paths ending in .prom get Prometheus textfile
+    format, anything else gets JSON. The file is replaced atomically so
+    scrapers never see a partial file.
+
+    Args:
+        metrics_path: Destination path
+        summary: JSON-serialisable summary dictionary
+        to_prometheus: Function that renders summary in Prometheus text format
+    """
+    if metrics_path.lower().endswith(PROMETHEUS_EXTENSIONS):
+        content = to_prometheus(summary)
+    else:
+        content = json.dumps(summary, indent=2) + "\n"
+
+    # Ensure output directory exists
+    output_dir = os.path.dirname(metrics_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    temp_path = f"{metrics_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="\n") as handle:
+        handle.write(content)
+    os.replace(temp_path, metrics_path)
+
+
+def _file_size(path):
+    """Returns the size of a file in bytes, or 0 if it does not exist"""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+class RunMetrics:
+    """
+    Collects per-file and per-run statistics for one execution of a branding
+    script and writes them as JSON or as a Prometheus textfile.
+
+    Typical use:
+        metrics = RunMetrics("format_all_screenshots")
+        started = time.perf_counter()
+        result = format_screenshot(input_path, output_path)
+        metrics.record_file(input_path, result, time.perf_counter() - started)
+        metrics.write_all(["metrics.json", "metrics.prom"])
+    """
+
+    def __init__(self, script_name):
+        self.script_name = script_name
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.files = []
+
+    def record_file(self, input_path, output_path, duration_seconds, skipped=False):
+        """
+        Records the outcome of processing one input file.
+
+        Args:
+            input_path: Path of the file that was read
+            output_path: Path (or list of paths) that was written, or None if processing failed
+            duration_seconds: Time spent on this file
+            skipped: True if the file was intentionally not processed
+        """
+        if isinstance(output_path, (list, tuple)):
+            output_paths = [path for path in output_path if path]
+        else:
+            output_paths = [output_path] if output_path else []
+
+        if skipped:
+            status = "skipped"
+        elif output_paths:
+            status = "processed"
+        else:
+            status = "failed"
+
+        self.files.append({
+            "input": input_path,
+            "outputs": output_paths,
+            "status": status,
+            "input_bytes": _file_size(input_path),
+            "output_bytes": sum(_file_size(path) for path in output_paths),
+            "duration_seconds": duration_seconds,
+        })
+
+    def to_dict(self):
+        """Returns a summary of the run as a JSON-serialisable dictionary"""
+        total_duration = time.perf_counter() - self._started
+
+        status_counts = {"processed": 0, "skipped": 0, "failed": 0}
+        for entry in self.files:
+            status_counts[entry["status"]] += 1
+
+        input_bytes = sum(entry["input_bytes"] for entry in self.files)
+        output_bytes = sum(entry["output_bytes"] for entry in self.files)
+        durations = [entry["duration_seconds"] for entry in self.files]
+        file_time = sum(durations)
+
+        return {
+            "script": self.script_name,
+            "started_at": self.started_at,
+            "finished_at": self.started_at + total_duration,
+            "python_version": platform.python_version(),
+            "pillow_version": get_pillow_version(),
+            "files_total": len(self.files),
+            "files_processed": status_counts["processed"],
+            "files_skipped": status_counts["skipped"],
+            "files_failed": status_counts["failed"],
+            "input_bytes": input_bytes,
+            "output_bytes": output_bytes,
+            "duration_seconds": total_duration,
+            "file_duration_seconds": {
+                "sum": file_time,
+                "count": len(durations),
+                "min": min(durations) if durations else None,
+                "max": max(durations) if durations else None,
+                "mean": file_time / len(durations) if durations else None,
+            },
+            "throughput": {
+                "files_per_second": len(self.files) / total_duration if total_duration > 0 else None,
+                "input_bytes_per_second": input_bytes / total_duration if total_duration > 0 else None,
+            },
+            "peak_rss_bytes": get_peak_rss_bytes(),
+            "files": self.files,
+        }
+
+    def to_prometheus(self, summary=None):
+        """
+        Returns the run summary in Prometheus text exposition format, suitable
+        for the node_exporter textfile collector.
+
+        Args:
+            summary: Result of to_dict() to render (computed if not given)
+        """
+        if summary is None:
+            summary = self.to_dict()
+
+        script_label = {"script": self.script_name}
+        lines = []
+
+        def add(name, metric_type, help_text, samples):
+            lines.extend(format_prometheus_metric(f"{METRIC_PREFIX}_{name}", metric_type, help_text, samples))
+
+        add("info", "gauge", "Versions used for the run.", [
+            ("", dict(script_label,
+                      python_version=summary["python_version"],
+                      pillow_version=summary["pillow_version"] or "unknown"), 1),
+        ])
+        add("files", "gauge", "Files handled by the run, by outcome.", [
+            ("", dict(script_label, status=status), summary[f"files_{status}"])
+            for status in ("processed", "skipped", "failed")
+        ])
+        add("input_bytes", "gauge", "Bytes read from input files.", [
+            ("", script_label, summary["input_bytes"]),
+        ])
+        add("output_bytes", "gauge", "Bytes written to output files.", [
+            ("", script_label, summary["output_bytes"]),
+        ])
+        add("duration_seconds", "gauge", "Wall-clock duration of the whole run.", [
+            ("", script_label, summary["duration_seconds"]),
+        ])
+        file_durations = summary["file_duration_seconds"]
+        add("file_duration_seconds", "summary", "Time spent processing each file.", [
+            ("_sum", script_label, file_durations["sum"]),
+            ("_count", script_label, file_durations["count"]),
+        ])
+        add("file_duration_max_seconds", "gauge", "Slowest single file in the run.", [
+            ("", script_label, file_durations["max"]),
+        ])
+        add("files_per_second", "gauge", "Files handled per second of run time.", [
+            ("", script_label, summary["throughput"]["files_per_second"]),
+        ])
+        add("input_bytes_per_second", "gauge", "Input bytes handled per second of run time.", [
+            ("", script_label, summary["throughput"]["input_bytes_per_second"]),
+        ])
+        add("peak_rss_bytes", "gauge", "Peak resident set size of the process.", [
+            ("", script_label, summary["peak_rss_bytes"]),
+        ])
+        add("last_run_timestamp_seconds", "gauge", "Unix time at which the run finished.", [
+            ("", script_label, summary["finished_at"]),
+        ])
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_path, summary=None):
+        """
+        Writes the metrics file. Paths ending in .prom get Prometheus textfile
+        format, anything else gets JSON. The file is replaced atomically so
+        scrapers never see a partial file.
+
+        Args:
+            metrics_path: Destination path
+            summary: Result of to_dict() to write (computed if not given)
+        """
+        if summary is None:
+            summary = self.to_dict()
+        write_metrics_file(metrics_path, summary, self.to_prometheus)
+
+    def write_all(self, metrics_paths):
+        """
+        Writes every requested metrics file, reporting (but not raising) errors
+        so a metrics problem never fails the branding job itself.
+
+        Args:
+            metrics_paths: List of destination paths (may be empty)
+        """
+        if not metrics_paths:
+            return
+
+        # Take one snapshot so JSON and Prometheus files agree with each other
+        summary = self.to_dict()
+        for metrics_path in metrics_paths:
+            try:
+                self.write(metrics_path, summary)
+                print(f"Wrote run metrics: {metrics_path}")
+            except Exception as e:
+                print(f"Error writing run metrics to {metrics_path}: {str(e)}")
+
+
+def _format_labels(labels):
+    """Formats a label dictionary as a Prometheus label set"""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    """Formats a sample value for the Prometheus text format"""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
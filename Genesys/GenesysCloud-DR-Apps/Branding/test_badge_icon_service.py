@@ -0,0 +1,360 @@
+import io
+import os
+import time
+import hashlib
+import tempfile
+import threading
+import unittest
+import http.client
+from urllib.parse import parse_qs
+from PIL import Image
+from create_chrome_extension_icon import load_badge_font, measure_text
+from badge_icon_service import (
+    BadgeCache,
+    BadgeIconServer,
+    BadgeIconService,
+    BadgeRequestError,
+    RENDER_VERSION,
+    etag_matches,
+    parse_badge_params,
+)
+
+BASE_ICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "GenesysCloud_icon.ico")
+
+
+def parse(query):
+    return parse_badge_params(parse_qs(query, keep_blank_values=True))
+
+
+class ParseBadgeParamsTests(unittest.TestCase):
+
+    def test_defaults(self):
+        self.assertEqual(parse(""), {"label": "DR", "color": (255, 0, 0, 255), "size": 128, "shape": "square"})
+
+    def test_hex_color_without_hash(self):
+        self.assertEqual(parse("color=00ff00")["color"], (0, 255, 0, 255))
+        self.assertEqual(parse("color=%2300f")["color"], (0, 0, 255, 255))
+
+    def test_invalid_values(self):
+        for query in ("label=", "label=%20", "label=ABCDEFGHIJKLM", "color=nope", "color=",
+                      "size=abc", "size=15", "size=513", "shape=hexagon"):
+            with self.subTest(query=query):
+                with self.assertRaises(BadgeRequestError):
+                    parse(query)
+
+
+class EtagMatchesTests(unittest.TestCase):
+
+    def test_matches(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertFalse(etag_matches('"abd"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+
+class BadgeFontTests(unittest.TestCase):
+
+    def test_fonts_are_cached_per_size(self):
+        self.assertIs(load_badge_font(20), load_badge_font(20))
+
+    def test_text_scales_with_font_size(self):
+        small = measure_text(load_badge_font(10), "DR", 10)
+        large = measure_text(load_badge_font(80), "DR", 80)
+        self.assertGreater(large[0], small[0] * 4)
+        self.assertGreater(large[1], small[1] * 4)
+
+
+def key(name):
+    """Returns a spillable cache key (40 hex characters, like badge_key())"""
+    return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+
+def spill_file(name):
+    return f"{key(name)}.bin"
+
+
+class BadgeCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.spill_dir = os.path.join(self.temp_dir.name, "spill")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, path, content=b"x" * 100, mtime=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as handle:
+            handle.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = BadgeCache(max_bytes=1000, max_entries=2)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.get("a")
+        cache.put("c", b"3")
+        self.assertEqual(cache.get("a"), b"1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), b"3")
+
+    def test_byte_limit(self):
+        cache = BadgeCache(max_bytes=250, max_entries=10)
+        for name in ("a", "b", "c"):
+            cache.put(name, b"x" * 100)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.current_bytes, 200)
+        self.assertIsNone(cache.get("a"))
+
+    def test_spill_and_promote(self):
+        cache = BadgeCache(max_bytes=1000, max_entries=1, spill_dir=self.spill_dir)
+        self.assertEqual(cache.spill_dir, os.path.join(self.spill_dir, f"badges-v{RENDER_VERSION}"))
+        cache.put(key("a"), b"first")
+        cache.put(key("b"), b"second")
+        self.assertEqual(os.listdir(cache.spill_dir), [spill_file("a")])
+        self.assertEqual(cache.get(key("a")), b"first")
+        # Promoting "a" evicts "b" to disk
+        self.assertEqual(sorted(os.listdir(cache.spill_dir)), sorted([spill_file("a"), spill_file("b")]))
+        self.assertEqual(cache.get(key("b")), b"second")
+
+    def test_only_badge_keys_are_spilled(self):
+        cache = BadgeCache(max_bytes=1000, max_entries=1, spill_dir=self.spill_dir)
+        cache.put("../escape", b"first")
+        cache.put(key("b"), b"second")
+        self.assertEqual(os.listdir(cache.spill_dir), [])
+
+    def test_spill_budget_deletes_oldest_files(self):
+        cache = BadgeCache(max_bytes=1000, max_entries=1, spill_dir=self.spill_dir,
+                           spill_max_bytes=250, spill_max_files=10)
+        for name in ("a", "b", "c", "d"):
+            cache.put(key(name), b"x" * 100)
+        self.assertEqual(sorted(os.listdir(cache.spill_dir)), sorted([spill_file("b"), spill_file("c")]))
+        self.assertEqual(cache.stats()["disk"], {"bytes": 200, "entries": 2, "max_bytes": 250, "max_entries": 10})
+
+        cache = BadgeCache(max_bytes=1000, max_entries=1, spill_dir=self.spill_dir,
+                           spill_max_bytes=1000, spill_max_files=1)
+        for name in ("e", "f"):
+            cache.put(key(name), b"x" * 100)
+        self.assertEqual(os.listdir(cache.spill_dir), [spill_file("e")])
+
+    def test_startup_prunes_existing_spill(self):
+        version_dir = os.path.join(self.spill_dir, f"badges-v{RENDER_VERSION}")
+        now = time.time()
+        for index, name in enumerate(("old", "mid", "new")):
+            self.write(os.path.join(version_dir, spill_file(name)), mtime=now + index)
+        self.write(os.path.join(version_dir, f"{spill_file('new')}.1.tmp"), b"partial")
+
+        cache = BadgeCache(spill_dir=self.spill_dir, spill_max_bytes=200, spill_max_files=10)
+        self.assertEqual(sorted(os.listdir(version_dir)), sorted([spill_file("mid"), spill_file("new")]))
+        self.assertEqual(cache.get(key("new")), b"x" * 100)
+        self.assertIsNone(cache.get(key("old")))
+
+    def test_foreign_files_survive_startup_and_pruning(self):
+        version_dir = os.path.join(self.spill_dir, f"badges-v{RENDER_VERSION}")
+        old_version_dir = os.path.join(self.spill_dir, f"badges-v{RENDER_VERSION + 1000}")
+        foreign = [
+            os.path.join(self.spill_dir, "notes.tmp"),
+            os.path.join(self.spill_dir, "firmware.bin"),
+            os.path.join(self.spill_dir, spill_file("root")),
+            os.path.join(version_dir, "notes.tmp"),
+            os.path.join(version_dir, "firmware.bin"),
+            os.path.join(old_version_dir, "keep.txt"),
+        ]
+        for path in foreign:
+            self.write(path)
+        self.write(os.path.join(version_dir, spill_file("ours")))
+        self.write(os.path.join(old_version_dir, spill_file("stale")))
+
+        cache = BadgeCache(max_bytes=1000, max_entries=1, spill_dir=self.spill_dir,
+                           spill_max_bytes=0, spill_max_files=0)
+        for name in ("a", "b", "c"):
+            cache.put(key(name), b"x" * 100)
+
+        for path in foreign:
+            self.assertTrue(os.path.exists(path), path)
+        self.assertFalse(os.path.exists(os.path.join(version_dir, spill_file("ours"))))
+        self.assertEqual(os.listdir(old_version_dir), ["keep.txt"])
+
+    def test_old_version_directory_is_removed_when_empty(self):
+        old_version_dir = os.path.join(self.spill_dir, f"badges-v{RENDER_VERSION + 1000}")
+        self.write(os.path.join(old_version_dir, spill_file("stale")))
+        BadgeCache(spill_dir=self.spill_dir)
+        self.assertFalse(os.path.exists(old_version_dir))
+
+
+class BadgeIconServerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cache = BadgeCache(max_bytes=1024 * 1024, max_entries=4, spill_dir=cls.temp_dir.name)
+        cls.service = BadgeIconService(BASE_ICON, cache)
+        cls.server = BadgeIconServer(("127.0.0.1", 0), cls.service, workers=8, quiet=True)
+        cls.port = cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.temp_dir.cleanup()
+
+    def request(self, path, method="GET", headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        try:
+            connection.request(method, path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.headers, response.read()
+        finally:
+            connection.close()
+
+    def test_png_badge(self):
+        status, headers, body = self.request("/badge.png?label=TEST&color=orange&size=64")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "image/png")
+        self.assertTrue(headers["ETag"].startswith('"'))
+        self.assertEqual(Image.open(io.BytesIO(body)).size, (64, 64))
+
+    def test_ico_badge_contains_standard_sizes(self):
+        status, headers, body = self.request("/badge.ico?label=DEV&color=blue&size=48&shape=circle")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "image/x-icon")
+        self.assertEqual(Image.open(io.BytesIO(body)).info["sizes"], {(16, 16), (32, 32), (48, 48)})
+
+    def test_head_has_no_body(self):
+        status, headers, body = self.request("/badge.png?label=HEAD", method="HEAD")
+        self.assertEqual(status, 200)
+        self.assertGreater(int(headers["Content-Length"]), 0)
+        self.assertEqual(body, b"")
+
+    def etag_lookups(self):
+        counts = self.service.metrics.to_dict()["caches"].get("etag", {"hits": 0, "misses": 0})
+        return counts["hits"], counts["misses"]
+
+    def test_matching_etag_returns_304_without_rendering(self):
+        path = "/badge.png?label=ETAG&shape=triangle"
+        lookups = self.etag_lookups()
+        status, headers, _ = self.request(path)
+        self.assertEqual(status, 200)
+        etag = headers["ETag"]
+        # A request without If-None-Match is not an ETag lookup
+        self.assertEqual(self.etag_lookups(), lookups)
+
+        renders = self.service.metrics.renders
+        status, headers, body = self.request(path, headers={"If-None-Match": etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(headers["ETag"], etag)
+        self.assertEqual(body, b"")
+        self.assertEqual(self.service.metrics.renders, renders)
+
+        status, _, _ = self.request(path, headers={"If-None-Match": '"stale"'})
+        self.assertEqual(status, 200)
+        self.assertEqual(self.etag_lookups(), (lookups[0] + 1, lookups[1] + 1))
+
+    def test_concurrent_identical_requests_share_one_render(self):
+        # Slow the render down so all requests arrive while it is in flight
+        original_render = self.service.render
+
+        def slow_render(fmt, params):
+            time.sleep(0.3)
+            return original_render(fmt, params)
+
+        self.service.render = slow_render
+        try:
+            renders = self.service.metrics.renders
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(self.request("/badge.png?label=CONC")))
+                for _ in range(12)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            del self.service.render
+
+        self.assertEqual([status for status, _, _ in results], [200] * 12)
+        self.assertEqual(len({body for _, _, body in results}), 1)
+        self.assertEqual(self.service.metrics.renders, renders + 1)
+
+    def test_invalid_requests(self):
+        for path in ("/badge.png?label=", "/badge.png?size=9000", "/badge.png?color=nope", "/badge.ico?shape=star"):
+            with self.subTest(path=path):
+                status, headers, body = self.request(path)
+                self.assertEqual(status, 400)
+                self.assertEqual(headers["Content-Type"], "application/json")
+                self.assertIn(b"error", body)
+        self.assertEqual(self.request("/nope")[0], 404)
+
+    def test_health_and_metrics(self):
+        self.assertEqual(self.request("/healthz")[2], b"ok\n")
+        self.request("/badge.png?label=MET")
+        status, _, body = self.request("/metrics")
+        self.assertEqual(status, 200)
+        text = body.decode("utf-8")
+        self.assertIn('badge_service_requests_total{code="200"}', text)
+        self.assertIn("badge_service_renders_total", text)
+        self.assertIn('badge_service_cache_entries{tier="memory"}', text)
+        self.assertNotIn("branding_run_files", text)
+
+
+class BadgeIconServerBacklogTests(unittest.TestCase):
+
+    def test_connections_beyond_max_pending_get_503(self):
+        service = BadgeIconService(BASE_ICON)
+        server = BadgeIconServer(("127.0.0.1", 0), service, workers=1, quiet=True, max_pending=1)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        started = threading.Event()
+        release = threading.Event()
+        original_render = service.render
+
+        def blocked_render(fmt, params):
+            started.set()
+            release.wait(10)
+            return original_render(fmt, params)
+
+        service.render = blocked_render
+
+        def request(path):
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                return response.status, response.headers, response.read()
+            finally:
+                connection.close()
+
+        try:
+            results = []
+            busy = threading.Thread(target=lambda: results.append(request("/badge.png?label=BUSY")))
+            busy.start()
+            self.assertTrue(started.wait(10))
+
+            status, headers, body = request("/badge.png?label=MORE")
+            self.assertEqual(status, 503)
+            self.assertEqual(headers["Retry-After"], "1")
+            self.assertIn(b"busy", body)
+
+            release.set()
+            busy.join()
+            self.assertEqual(results[0][0], 200)
+            # The slot is freed just after the first connection is closed
+            deadline = time.time() + 5
+            while request("/healthz")[0] != 200:
+                self.assertLess(time.time(), deadline)
+                time.sleep(0.05)
+            self.assertGreaterEqual(service.metrics.to_dict()["requests"]["503"], 1)
+        finally:
+            release.set()
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import json
+import tempfile
+import unittest
+from run_metrics import RunMetrics, format_prometheus_metric, pop_metrics_args
+
+
+class PopMetricsArgsTests(unittest.TestCase):
+
+    def test_removes_both_forms(self):
+        argv = ["script.py", "in.png", "--metrics", "a.json", "out.png", "--metrics=b.prom", "640x400"]
+        self.assertEqual(pop_metrics_args(argv), ["a.json", "b.prom"])
+        self.assertEqual(argv, ["script.py", "in.png", "out.png", "640x400"])
+
+    def test_no_option(self):
+        argv = ["script.py", "in.png"]
+        self.assertEqual(pop_metrics_args(argv), [])
+        self.assertEqual(argv, ["script.py", "in.png"])
+
+    def test_missing_path_is_ignored(self):
+        argv = ["script.py", "in.png", "--metrics"]
+        self.assertEqual(pop_metrics_args(argv), [])
+        self.assertEqual(argv, ["script.py", "in.png"])
+
+
+class FormatPrometheusMetricTests(unittest.TestCase):
+
+    def test_escapes_label_values(self):
+        lines = format_prometheus_metric("m", "gauge", "Help.", [("", {"path": 'C:\\a "b"\nc'}, 1)])
+        self.assertEqual(lines, [
+            "# HELP m Help.",
+            "# TYPE m gauge",
+            'm{path="C:\\\\a \\"b\\"\\nc"} 1',
+        ])
+
+    def test_drops_missing_values(self):
+        self.assertEqual(format_prometheus_metric("m", "gauge", "Help.", [("", {}, None)]), [])
+        self.assertEqual(format_prometheus_metric("m", "gauge", "Help.", [("", {}, 0.5)])[-1], "m 0.5")
+
+
+class RunMetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_path = self.path("input.png", b"x" * 10)
+        self.output_path = self.path("output.png", b"y" * 25)
+        self.second_output = self.path("output.ico", b"z" * 5)
+
+        self.metrics = RunMetrics("test_script")
+        self.metrics.record_file(self.input_path, self.output_path, 0.5)
+        self.metrics.record_file(self.input_path, [self.output_path, self.second_output, None], 1.5)
+        self.metrics.record_file(self.input_path, None, 0.25, skipped=True)
+        self.metrics.record_file(self.input_path, None, 0.75)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name, content=None):
+        path = os.path.join(self.temp_dir.name, name)
+        if content is not None:
+            with open(path, "wb") as handle:
+                handle.write(content)
+        return path
+
+    def test_classifies_files(self):
+        statuses = [entry["status"] for entry in self.metrics.files]
+        self.assertEqual(statuses, ["processed", "processed", "skipped", "failed"])
+        self.assertEqual(self.metrics.files[1]["outputs"], [self.output_path, self.second_output])
+
+    def test_json_output(self):
+        metrics_path = self.path(os.path.join("nested", "run.json"))
+        self.metrics.write(metrics_path)
+        with open(metrics_path, encoding="utf-8") as handle:
+            summary = json.load(handle)
+
+        self.assertEqual(summary["script"], "test_script")
+        self.assertEqual(summary["files_total"], 4)
+        self.assertEqual(summary["files_processed"], 2)
+        self.assertEqual(summary["files_skipped"], 1)
+        self.assertEqual(summary["files_failed"], 1)
+        self.assertEqual(summary["input_bytes"], 40)
+        self.assertEqual(summary["output_bytes"], 55)
+        self.assertEqual(summary["file_duration_seconds"]["sum"], 3.0)
+        self.assertEqual(summary["file_duration_seconds"]["max"], 1.5)
+        self.assertEqual(summary["file_duration_seconds"]["min"], 0.25)
+        self.assertEqual(len(summary["files"]), 4)
+        # Written via a temporary file that is renamed into place
+        self.assertEqual(os.listdir(os.path.dirname(metrics_path)), ["run.json"])
+
+    def test_prometheus_output(self):
+        metrics_path = self.path("run.prom")
+        self.metrics.write(metrics_path)
+        with open(metrics_path, encoding="utf-8") as handle:
+            lines = handle.read().splitlines()
+
+        self.assertIn('branding_run_files{script="test_script",status="processed"} 2', lines)
+        self.assertIn('branding_run_files{script="test_script",status="skipped"} 1', lines)
+        self.assertIn('branding_run_files{script="test_script",status="failed"} 1', lines)
+        self.assertIn('branding_run_input_bytes{script="test_script"} 40', lines)
+        self.assertIn('branding_run_output_bytes{script="test_script"} 55', lines)
+        self.assertIn('branding_run_file_duration_seconds_sum{script="test_script"} 3.0', lines)
+        self.assertIn('branding_run_file_duration_seconds_count{script="test_script"} 4', lines)
+        self.assertIn("# TYPE branding_run_file_duration_seconds summary", lines)
+        for line in lines:
+            if not line.startswith("#"):
+                self.assertTrue(line.startswith("branding_run_"), line)
+
+    def test_write_all_reports_errors_without_raising(self):
+        blocker = self.path("blocker", b"")
+        self.metrics.write_all([os.path.join(blocker, "run.json"), self.path("ok.json")])
+        self.assertTrue(os.path.exists(self.path("ok.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()